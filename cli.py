@@ -7,6 +7,7 @@ Interactive CLI:
 - Writes to ./output
 """
 import os
+import platform
 from pathlib import Path
 
 from config import CONFIG
@@ -21,6 +22,7 @@ except Exception:
 ROOT = Path(__file__).resolve().parent
 DATA_DIR = ROOT / "data"
 OUTPUT_DIR = ROOT / "output"
+LOGO_EXTS = (".png", ".jpg", ".jpeg", ".svg")
 
 
 def _warn_svg_logo_png_without_cairo(logo_path: str | None, ext: str) -> bool:
@@ -41,7 +43,8 @@ def _warn_svg_logo_png_without_cairo(logo_path: str | None, ext: str) -> bool:
 
 
 def _pick_logo() -> str | None:
-    logos = [p for p in DATA_DIR.glob("*") if p.suffix.lower() in (".png", ".jpg", ".jpeg", ".svg")]
+    with os.scandir(DATA_DIR) as it:
+        logos = [e for e in it if e.is_file() and e.name.lower().endswith(LOGO_EXTS)]
     if not logos:
         print("No logos found in ./data. Continuing without a logo.")
         return None
@@ -55,7 +58,7 @@ def _pick_logo() -> str | None:
     try:
         idx = int(choice)
         if 1 <= idx <= len(logos):
-            return str(logos[idx - 1])
+            return logos[idx - 1].path
     except ValueError:
         pass
     print("Invalid selection. Skipping logo.")
@@ -75,6 +78,9 @@ def _ask_output_name(default_stem: str = "qr") -> tuple[str, str]:
 
 def main():
     print("=== Branded QR Generator ===")
+    if not CONFIG["pillow_simd"] and platform.machine().lower() in ("x86_64", "amd64"):
+        print("Tip: Pillow-SIMD speeds up logo resizing/compositing on this CPU (see readme):")
+        print("  pip uninstall -y pillow && pip install pillow-simd")
     data = input("What URL or text should the QR encode? ").strip()
     if not data:
         print("No data entered. Exiting.")
@@ -115,6 +121,8 @@ def main():
             pad_logo=pad_logo,
             pad_radius=CONFIG["pad_radius"],
             pad_margin_px=CONFIG["pad_margin_px"],
+            png_compress_level=CONFIG["png_compress_level"],
+            png_optimize=CONFIG["png_optimize"],
         )
     except Exception as e:
         print(f"\n❌ Failed: {e}")
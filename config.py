@@ -21,9 +21,25 @@ CONFIG = {
     # PNG pixel scaling (ignored for SVG)
     "scale": 14,
 
+    # PNG encoding: zlib level 0–9 (1 = fast) and Pillow's extra optimize pass
+    "png_compress_level": 1,
+    "png_optimize": False,
+
     # Logo settings
     "logo_frac": 0.22,    # ~22% of QR width
     "pad_logo": True,     # Add white pad for contrast
     "pad_radius": 18,
     "pad_margin_px": 10,
-}
\ No newline at end of file
+}
+
+# Pillow-SIMD (drop-in Pillow build with SSE4/AVX2 resize/blend) versions carry a ".postN" suffix
+try:
+    import PIL
+    _pillow_simd = ".post" in PIL.__version__
+except Exception:
+    _pillow_simd = False
+CONFIG["pillow_simd"] = _pillow_simd
+
+_VALID_ECC = frozenset("lmqh")
+if CONFIG["ecc"] not in _VALID_ECC:
+    raise ValueError(f"CONFIG['ecc'] must be one of l,m,q,h (got {CONFIG['ecc']!r})")
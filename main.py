@@ -4,41 +4,114 @@ Branded QR generator (static, no expiration).
 - Uses segno to make QR
 - Optional centered logo (PNG/JPG/SVG)
 - PNG or SVG export
+- Batch export sharing one prepared logo
 """
 from __future__ import annotations
 import io, os, base64, re
-from typing import Optional
+from functools import lru_cache
+from typing import Iterable, Optional
 
 import segno
-from PIL import Image, ImageDraw
+from PIL import Image
 
 try:
     import cairosvg  # optional: rasterize SVG logos or embed logos into SVG output
 except Exception:
     cairosvg = None
 
+_ECC = frozenset("lmqh")
+
+# Width, height and viewBox on the opening <svg> tag, read in one bounded scan.
+# segno's default output (as written by generate_qr) has width/height but no
+# viewBox, so it takes the percentage fallback; this only matches SVG text that
+# carries all three, e.g. from callers of _embed_logo_in_svg.
+_SVG_ATTR_RE = re.compile(
+    r'<svg\b[^>]*?width="([\d.]+)\w*"[^>]*?height="([\d.]+)\w*"[^>]*?'
+    r'viewBox="(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)"'
+)
+_SVG_HEADER_LEN = 512
+
+_IMG_TAG = '<image x="{x}" y="{y}" width="{w}" height="{h}" href="data:{mime};base64,{b64}" />'
+_IMG_TAG_PCT = (
+    '<image x="50%" y="50%" width="{pct}%" height="{pct}%" '
+    'href="data:{mime};base64,{b64}" transform="translate(-{half}%, -{half}%)" />'
+)
+
 
 def _make_qr(data: str, ecc: str = "h", border: int = 3):
     """Return a segno QR object with chosen ECC and border."""
-    if ecc not in "lmqh":
+    if ecc not in _ECC:
         raise ValueError("ecc must be one of l,m,q,h")
     return segno.make(data, error=ecc), {"border": border}
 
 
-def _paste_logo_on_png(
-    img: Image.Image,
+def _qr_to_image(q, border: int = 3, scale: int = 12) -> Image.Image:
+    """Paint the QR modules straight into a greyscale Pillow image (no PNG round trip)."""
+    size = q.symbol_size(scale=1, border=border)
+    modules = bytes(0 if dark else 255 for row in q.matrix_iter(scale=1, border=border) for dark in row)
+    img = Image.frombytes("L", size, modules)
+    return img.resize((size[0] * scale, size[1] * scale), Image.NEAREST)
+
+
+def _is_svg(path: str) -> bool:
+    """True if the path has a .svg suffix (only the tail is lowercased)."""
+    return path[-4:].lower() == ".svg"
+
+
+@lru_cache(maxsize=16)
+def _rasterize_svg_logo(path: str, mtime: float, width: int, height: int) -> bytes:
+    """Rasterize an SVG logo to PNG bytes; cached on (path, mtime, size)."""
+    return cairosvg.svg2png(url=path, output_width=width, output_height=height)
+
+
+@lru_cache(maxsize=8)
+def _corner_masks(r: int) -> tuple[Image.Image, Image.Image, Image.Image, Image.Image]:
+    """Return (top-left, top-right, bottom-left, bottom-right) quarter-circle alpha masks of size r×r."""
+    rr = r * r
+    tl = Image.frombytes(
+        "L",
+        (r, r),
+        bytes(255 if (x + 0.5 - r) ** 2 + (y + 0.5 - r) ** 2 <= rr else 0 for y in range(r) for x in range(r)),
+    )
+    return (
+        tl,
+        tl.transpose(Image.FLIP_LEFT_RIGHT),
+        tl.transpose(Image.FLIP_TOP_BOTTOM),
+        tl.transpose(Image.ROTATE_180),
+    )
+
+
+@lru_cache(maxsize=32)
+def _pad_template(pad_w: int, pad_h: int, pad_radius: int) -> Image.Image:
+    """Return a white rounded-rectangle pad; callers must copy() before drawing on it."""
+    # Colour is constant white, so only the alpha plane needs the rounded shape:
+    # an opaque fill with the cached quarter-circle masks pasted into each corner
+    mask = Image.new("L", (pad_w, pad_h), 255)
+    r = min(pad_radius, pad_w // 2, pad_h // 2)
+    if r > 0:
+        tl, tr, bl, br = _corner_masks(r)
+        mask.paste(tl, (0, 0))
+        mask.paste(tr, (pad_w - r, 0))
+        mask.paste(bl, (0, pad_h - r))
+        mask.paste(br, (pad_w - r, pad_h - r))
+    pad_img = Image.new("RGBA", (pad_w, pad_h), (255, 255, 255, 0))
+    pad_img.putalpha(mask)
+    return pad_img
+
+
+def _prepare_png_logo(
+    qr_width: int,
     logo_path: str,
     logo_frac: float = 0.22,
     pad: bool = True,
     pad_radius: int = 18,
     pad_margin_px: int = 10,
 ) -> Image.Image:
-    """Overlay a logo at the center of a PNG QR image."""
-    W, H = img.size
-    ext = os.path.splitext(logo_path.lower())[1]
+    """Load, resize and (optionally) pad a logo for a PNG QR of the given width."""
+    target_w = max(1, int(qr_width * logo_frac))
 
     # Load logo
-    if ext == ".svg":
+    if _is_svg(logo_path):
         if cairosvg is None:
             raise RuntimeError(
                 "SVG logo selected but CairoSVG is not available to rasterize it for PNG export.\n"
@@ -47,73 +120,119 @@ def _paste_logo_on_png(
                 " - Use a PNG/JPG logo, or\n"
                 " - Export the QR as SVG (vector) instead of PNG."
             )
-        raster = cairosvg.svg2png(url=logo_path, output_width=1024, output_height=1024)
-        logo = Image.open(io.BytesIO(raster)).convert("RGBA")
+        path = os.path.abspath(logo_path)
+        raster = _rasterize_svg_logo(path, os.path.getmtime(path), target_w, target_w)
+        logo = Image.open(io.BytesIO(raster))
     else:
-        logo = Image.open(logo_path).convert("RGBA")
+        logo = Image.open(logo_path)
+    if logo.mode != "RGBA":
+        logo = logo.convert("RGBA")
+
+    # Shrink in place; thumbnail() never enlarges, so small logos fall through to resize().
+    # Logos taller than 10:1 would be height-bound here and re-enlarged below, so skip it.
+    if logo.height <= logo.width * 10:
+        logo.thumbnail((target_w, target_w * 10), Image.LANCZOS)
 
     # Resize logo to a fraction of QR width
-    target_w = max(1, int(W * logo_frac))
     ratio = target_w / logo.width
     target_h = max(1, int(logo.height * ratio))
-    logo = logo.resize((target_w, target_h), Image.LANCZOS)
+    if logo.size != (target_w, target_h):
+        logo = logo.resize((target_w, target_h), Image.LANCZOS)
 
     # Optional white pad for contrast
     if pad:
         pad_w = target_w + pad_margin_px * 2
         pad_h = target_h + pad_margin_px * 2
-        pad_img = Image.new("RGBA", (pad_w, pad_h), (0, 0, 0, 0))
-        d = ImageDraw.Draw(pad_img)
-        d.rounded_rectangle((0, 0, pad_w, pad_h), pad_radius, fill=(255, 255, 255, 255))
-        pad_img.paste(logo, ((pad_w - target_w) // 2, (pad_h - target_h) // 2), logo)
+        pad_img = _pad_template(pad_w, pad_h, pad_radius).copy()
+        pad_img.alpha_composite(logo, ((pad_w - target_w) // 2, (pad_h - target_h) // 2))
         logo = pad_img
-        target_w, target_h = logo.size
+    return logo
 
-    # Paste centered
-    x = (W - target_w) // 2
-    y = (H - target_h) // 2
-    img.paste(logo, (x, y), logo)
+
+def _composite_center(img: Image.Image, logo: Image.Image) -> Image.Image:
+    """Composite a prepared logo at the center (only the logo-sized patch is touched)."""
+    x = (img.width - logo.width) // 2
+    y = (img.height - logo.height) // 2
+    img.alpha_composite(logo, (x, y))
     return img
 
 
-def _embed_logo_in_svg(svg_qr: str, logo_path: str, logo_frac: float = 0.22) -> str:
-    """Embed a logo as an <image> inside an SVG QR code."""
-    ext = os.path.splitext(logo_path.lower())[1]
-    if ext == ".svg":
+def _paste_logo_on_png(
+    img: Image.Image,
+    logo_path: str,
+    logo_frac: float = 0.22,
+    pad: bool = True,
+    pad_radius: int = 18,
+    pad_margin_px: int = 10,
+) -> Image.Image:
+    """Overlay a logo at the center of a PNG QR image."""
+    logo = _prepare_png_logo(img.width, logo_path, logo_frac, pad, pad_radius, pad_margin_px)
+    return _composite_center(img, logo)
+
+
+def _inject_before_svg_close(svg_qr: str, inject: str) -> str:
+    """Insert markup just before the closing </svg> tag (segno emits it last)."""
+    end = svg_qr.rindex("</svg>")
+    return "".join((svg_qr[:end], inject, svg_qr[end:]))
+
+
+def _load_svg_logo(logo_path: str) -> tuple[str, str]:
+    """Return (mime, base64 payload) for embedding a logo in SVG output."""
+    if _is_svg(logo_path):
         with open(logo_path, "rb") as f:
             data = f.read()
         mime = "image/svg+xml"
         b64 = base64.b64encode(data).decode("ascii")
     else:
-        img = Image.open(logo_path).convert("RGBA")
+        img = Image.open(logo_path)
         buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        b64 = base64.b64encode(buf.getvalue()).decode("ascii")
-        mime = "image/png"
+        if img.mode in ("RGB", "CMYK") and "transparency" not in img.info:
+            # Opaque photo-like logo: JPEG is far smaller than PNG
+            img.save(buf, format="JPEG", optimize=True, quality=85)
+            mime = "image/jpeg"
+        else:
+            # Alpha, bilevel, greyscale or palette logos: lossless WebP beats PNG here
+            if img.mode != "RGBA":
+                img = img.convert("RGBA")  # also turns a tRNS key into real alpha
+            img.save(buf, format="WEBP", lossless=True)
+            mime = "image/webp"
+        b64 = base64.b64encode(buf.getbuffer()).decode("ascii")
+    return mime, b64
+
 
-    # Try to parse width/height/viewBox to place accurately
-    w_match = re.search(r'width="([\d\.]+)(\w*)"', svg_qr)
-    h_match = re.search(r'height="([\d\.]+)(\w*)"', svg_qr)
-    vb_match = re.search(r'viewBox="([\d\.\s\-]+)"', svg_qr)
+def _place_logo_in_svg(svg_qr: str, mime: str, b64: str, logo_frac: float = 0.22) -> str:
+    """Inject an already-encoded logo as a centered <image> in an SVG QR code."""
+    # Try to parse width/height/viewBox from the header to place accurately
+    m = _SVG_ATTR_RE.search(svg_qr, 0, _SVG_HEADER_LEN)
 
-    if not (w_match and h_match and vb_match):
+    if not m:
         # Fallback: percentage placement
         width_pct = int(logo_frac * 100)
-        inject = (
-            f'<image x="50%" y="50%" width="{width_pct}%" height="{width_pct}%" '
-            f'href="data:{mime};base64,{b64}" transform="translate(-{width_pct/2}%, -{width_pct/2}%)" />'
-        )
-        return svg_qr.replace("</svg>", inject + "</svg>")
+        inject = _IMG_TAG_PCT.format_map({"pct": width_pct, "half": width_pct / 2, "mime": mime, "b64": b64})
+        return _inject_before_svg_close(svg_qr, inject)
 
-    vb_x, vb_y, vb_w, vb_h = [float(x) for x in vb_match.group(1).split()]
+    vb_x, vb_y, vb_w, vb_h = map(float, m.group(3, 4, 5, 6))
     logo_w = vb_w * logo_frac
     logo_h = vb_h * logo_frac
     cx = vb_x + vb_w / 2
     cy = vb_y + vb_h / 2
     x = cx - logo_w / 2
     y = cy - logo_h / 2
-    inject = f'<image x="{x}" y="{y}" width="{logo_w}" height="{logo_h}" href="data:{mime};base64,{b64}" />'
-    return svg_qr.replace("</svg>", inject + "</svg>")
+    inject = _IMG_TAG.format_map({"x": x, "y": y, "w": logo_w, "h": logo_h, "mime": mime, "b64": b64})
+    return _inject_before_svg_close(svg_qr, inject)
+
+
+def _embed_logo_in_svg(svg_qr: str, logo_path: str, logo_frac: float = 0.22) -> str:
+    """Embed a logo as an <image> inside an SVG QR code."""
+    mime, b64 = _load_svg_logo(logo_path)
+    return _place_logo_in_svg(svg_qr, mime, b64, logo_frac)
+
+
+def _qr_to_svg(q, border: int = 3) -> str:
+    """Return the QR as SVG text (segno's SVG writer emits bytes)."""
+    buf = io.BytesIO()
+    q.save(buf, kind="svg", border=border)
+    return buf.getvalue().decode("utf-8")
 
 
 def generate_qr(
@@ -128,36 +247,92 @@ def generate_qr(
     pad_logo: bool = True,
     pad_radius: int = 18,
     pad_margin_px: int = 10,
+    png_compress_level: int = 1,
+    png_optimize: bool = False,
 ) -> str:
     """
     Generate a QR code (PNG or SVG).
     - data: text/URL to encode
     - out_path: file path ending in .png or .svg
+    - png_compress_level: zlib level (0-9) for PNG output
+    - png_optimize: Pillow's extra optimize pass; only applies when a logo is
+      composited (plain QRs are written by segno, which has no such option)
     """
-    q, _ = _make_qr(data, ecc=ecc, border=border)
-    out_lower = out_path.lower()
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    return generate_qr_batch(
+        [(data, out_path)],
+        ecc=ecc,
+        border=border,
+        scale=scale,
+        logo_path=logo_path,
+        logo_frac=logo_frac,
+        pad_logo=pad_logo,
+        pad_radius=pad_radius,
+        pad_margin_px=pad_margin_px,
+        png_compress_level=png_compress_level,
+        png_optimize=png_optimize,
+    )[0]
 
-    if out_lower.endswith(".png"):
-        # Render QR to an image and overlay logo if requested
-        buf = io.BytesIO()
-        q.save(buf, kind="png", border=border, scale=scale)
-        buf.seek(0)
-        img = Image.open(buf).convert("RGBA")
-        if logo_path:
-            img = _paste_logo_on_png(img, logo_path, logo_frac, pad_logo, pad_radius, pad_margin_px)
-        img.save(out_path)
-        return out_path
-
-    if out_lower.endswith(".svg"):
-        # Render QR to SVG text and embed logo if requested
-        s = io.StringIO()
-        q.save(s, kind="svg", border=border)
-        svg_txt = s.getvalue()
-        if logo_path:
-            svg_txt = _embed_logo_in_svg(svg_txt, logo_path, logo_frac)
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(svg_txt)
-        return out_path
-
-    raise ValueError("out_path must end with .png or .svg")
\ No newline at end of file
+
+def generate_qr_batch(
+    items: Iterable[tuple[str, str]],
+    *,
+    ecc: str = "h",
+    border: int = 3,
+    scale: int = 12,
+    logo_path: Optional[str] = None,
+    logo_frac: float = 0.22,
+    pad_logo: bool = True,
+    pad_radius: int = 18,
+    pad_margin_px: int = 10,
+    png_compress_level: int = 1,
+    png_optimize: bool = False,
+) -> list[str]:
+    """
+    Generate many QR codes that share the same branding.
+    - items: (data, out_path) pairs; each out_path ends in .png or .svg
+    - other options as in generate_qr
+
+    The logo is loaded, resized and padded once per QR width (and encoded
+    once for SVG output) instead of once per code.
+    """
+    items = list(items)
+    # Reject bad suffixes before anything is written
+    for _, out_path in items:
+        if not out_path.lower().endswith((".png", ".svg")):
+            raise ValueError(f"out_path must end with .png or .svg (got {out_path!r})")
+
+    png_logos: dict[int, Image.Image] = {}
+    svg_logo: Optional[tuple[str, str]] = None
+    written = []
+
+    for data, out_path in items:
+        q, _ = _make_qr(data, ecc=ecc, border=border)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+        if out_path.lower().endswith(".png"):
+            if not logo_path:
+                # Plain QR: segno's own PNG writer is all we need
+                q.save(out_path, kind="png", border=border, scale=scale, compresslevel=png_compress_level)
+            else:
+                # Render QR modules to an image and overlay the logo
+                img = _qr_to_image(q, border=border, scale=scale).convert("RGBA")
+                logo = png_logos.get(img.width)
+                if logo is None:
+                    logo = png_logos[img.width] = _prepare_png_logo(
+                        img.width, logo_path, logo_frac, pad_logo, pad_radius, pad_margin_px
+                    )
+                img = _composite_center(img, logo)
+                img.save(out_path, format="PNG", compress_level=png_compress_level, optimize=png_optimize)
+
+        else:
+            # Render QR to SVG text and embed logo if requested
+            svg_txt = _qr_to_svg(q, border=border)
+            if logo_path:
+                if svg_logo is None:
+                    svg_logo = _load_svg_logo(logo_path)
+                svg_txt = _place_logo_in_svg(svg_txt, *svg_logo, logo_frac)
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(svg_txt)
+        written.append(out_path)
+
+    return written